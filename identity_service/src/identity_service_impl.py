@@ -1,7 +1,14 @@
 """Identity Service Controller"""
 
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
 from uuid import uuid4
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
 
 import grpc
 
@@ -11,7 +18,7 @@ from src.generated.identity_service.identity_service_pb2_grpc import (
 )
 from src.models import User, UserType
 from src.repository import TokenRepositoryInterface, UserRepositoryInterface
-from src.utilities import Encoder, JwtController, TokenType
+from src.utilities import Encoder, JwtController, TokenType, TtlCache
 import src.generated.identity_service.auth_pb2 as auth_proto
 import src.generated.identity_service.delete_user_pb2 as delete_user_proto
 import src.generated.identity_service.get_access_token_pb2 as get_access_token_proto
@@ -21,6 +28,13 @@ import src.generated.user.user_pb2 as user_proto
 
 from google.protobuf.empty_pb2 import Empty
 
+_EMPTY_RESPONSE = Empty()
+"""Shared response of the RPCs that return nothing, it serializes to zero bytes"""
+_OK_STATUS = grpc.StatusCode.OK
+"""Status code set by every successful RPC"""
+_MAX_PASSWORD_BYTES = 256
+"""Longer passwords are rejected before hashing, bcrypt only uses the first 72 bytes anyway"""
+
 
 class IdentityServiceImpl(GrpcServicer):
     """
@@ -42,6 +56,8 @@ class IdentityServiceImpl(GrpcServicer):
         Function that need to be bind to the server that returns user by its user_id
     async get_users_by_id(request, context)
         Function that need to be bind to the server that returns users that match provided user ids
+    async get_users_by_id_stream(request, context)
+        Function that need to be bind to the server that streams users that match provided user ids
     async update_user(request, context)
         Function that need to be bind to the server that updates user information
     async delete_user(request, context)
@@ -50,8 +66,24 @@ class IdentityServiceImpl(GrpcServicer):
         Function that need to be bind to the server that deletes refresh_token from database and logs the user off
     async get_all_users(request, context)
         Function that need to be bind to the server that returns all existing users
+    async get_all_users_stream(request, context)
+        Function that need to be bind to the server that streams all existing users
+    async warmup()
+        Open database connections before serving requests
+    close()
+        Release resources held by the service
     async _generate_tokens(session_id, user_id)
         Generate access and refresh tokens
+    _credentials_response(access_token, refresh_token, user)
+        Build credentials response
+    async _check_password(password, hashed_password)
+        Compare password with its hash using recently verified passwords cache
+    _decode_token(token, token_type)
+        Decode token using recently decoded tokens cache
+    async _get_users_by_ids_cached(user_ids)
+        Get users by ids, querying the repository only for users missing in the cache
+    _forget_user(user_id)
+        Remove user and user's sessions from the caches
 
     """
 
@@ -59,6 +91,14 @@ class IdentityServiceImpl(GrpcServicer):
     _token_repository: TokenRepositoryInterface
     _jwt_controller: JwtController
     _encoder: Encoder
+    _bcrypt_pool: ThreadPoolExecutor
+    _dummy_password_hash: str
+    _token_cache: TtlCache[Tuple[bytes, TokenType], Tuple[str, str]]
+    _session_cache: TtlCache[str, user_proto.GrpcUser]
+    _session_generation: int
+    _user_cache: TtlCache[str, user_proto.GrpcUser]
+    _password_cache: TtlCache[bytes, bool]
+    _password_cache_key: bytes
 
     def __init__(
         self,
@@ -69,6 +109,14 @@ class IdentityServiceImpl(GrpcServicer):
         self._token_repository = token_repository
         self._jwt_controller = JwtController()
         self._encoder = Encoder()
+        self._bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self._dummy_password_hash = self._encoder.encode(secrets.token_hex(16))
+        self._token_cache = TtlCache(max_size=10_000, ttl=5)
+        self._session_cache = TtlCache(max_size=10_000, ttl=5)
+        self._session_generation = 0
+        self._user_cache = TtlCache(max_size=10_000, ttl=5)
+        self._password_cache = TtlCache(max_size=4096, ttl=600)
+        self._password_cache_key = secrets.token_bytes(32)
 
     async def login(
         self, request: auth_proto.LoginRequest, context: grpc.ServicerContext
@@ -88,15 +136,38 @@ class IdentityServiceImpl(GrpcServicer):
         auth_proto.CredentialsResponse
             Response object with credentials and user's data
 
+        Raises
+        ------
+        ValueNotFoundError
+            Email or password is invalid. Unknown emails are checked against a dummy hash,
+            so both cases take the same time
+
         """
-        user = await self._user_repository.get_user_by_email(request.email)
+        if len(request.password.encode("UTF-8")) > _MAX_PASSWORD_BYTES:
+            raise ValueNotFoundError("Invalid email or password")
+
+        user: Optional[User]
+        try:
+            user = await self._user_repository.get_user_by_email(request.email)
+        except ValueNotFoundError:
+            user = None
+
+        password_matches = await self._check_password(
+            password=request.password,
+            hashed_password=(
+                user.password if user is not None else self._dummy_password_hash
+            ),
+        )
+        if user is None or not password_matches:
+            raise ValueNotFoundError("Invalid email or password")
 
-        if not self._encoder.compare(
-            password=request.password, hashed_password=user.password
-        ):
-            raise ValueNotFoundError("Invalid password")
+        if self._encoder.needs_rehash(user.password):
+            user.password = await asyncio.get_running_loop().run_in_executor(
+                self._bcrypt_pool, self._encoder.encode, request.password
+            )
+            user = await self._user_repository.update_user(user=user)
 
-        session_id = str(uuid4())
+        session_id = secrets.token_hex(16)
         access_token, refresh_token = self._generate_tokens(
             session_id=session_id, user_id=user.id
         )
@@ -104,13 +175,9 @@ class IdentityServiceImpl(GrpcServicer):
             refresh_token=refresh_token, session_id=session_id, user_id=user.id
         )
 
-        context.set_code(grpc.StatusCode.OK)
-        return auth_proto.CredentialsResponse(
-            data=auth_proto.LoginData(
-                access_token=access_token,
-                refresh_token=refresh_token,
-            ),
-            user=user.to_grpc_user()
+        context.set_code(_OK_STATUS)
+        return self._credentials_response(
+            access_token=access_token, refresh_token=refresh_token, user=user
         )
 
     async def register(
@@ -131,14 +198,23 @@ class IdentityServiceImpl(GrpcServicer):
         auth_proto.CredentialsResponse
             Response object with credentials and user's data
 
+        Raises
+        ------
+        ValueNotFoundError
+            Password is longer than 256 bytes
+
         """
         user = User.from_modify_grpc_user(request)
-        user.password = self._encoder.encode(user.password)
+        if len(user.password.encode("UTF-8")) > _MAX_PASSWORD_BYTES:
+            raise ValueNotFoundError("Invalid password")
+        user.password = await asyncio.get_running_loop().run_in_executor(
+            self._bcrypt_pool, self._encoder.encode, user.password
+        )
         user.id = str(uuid4())
 
         user = await self._user_repository.create_user(user=user)
 
-        session_id = str(uuid4())
+        session_id = secrets.token_hex(16)
         access_token, refresh_token = self._generate_tokens(
             session_id=session_id, user_id=user.id
         )
@@ -146,12 +222,9 @@ class IdentityServiceImpl(GrpcServicer):
             refresh_token=refresh_token, session_id=session_id, user_id=user.id
         )
 
-        context.set_code(grpc.StatusCode.OK)
-        return auth_proto.CredentialsResponse(
-            data=auth_proto.LoginData(
-                access_token=access_token, refresh_token=refresh_token
-            ),
-            user=user.to_grpc_user()
+        context.set_code(_OK_STATUS)
+        return self._credentials_response(
+            access_token=access_token, refresh_token=refresh_token, user=user
         )
 
     async def auth(
@@ -160,6 +233,10 @@ class IdentityServiceImpl(GrpcServicer):
         """
         Authenticates user by his token and returns his ID
 
+        Users are cached by session for a few seconds. Logout, update and deletion made through this instance
+        invalidate the cache immediately, changes made through other instances become visible after the cache expires.
+        A user fetched while any session was invalidated is returned but not cached
+
         Parameters
         ----------
         request : auth_proto.AccessToken
@@ -173,12 +250,19 @@ class IdentityServiceImpl(GrpcServicer):
             Response object with user object
 
         """
-        _, session_id = self._jwt_controller.decode(
+        _, session_id = self._decode_token(
             request.access_token, TokenType.ACCESS_TOKEN
         )
-        user = await self._user_repository.get_user_by_session_id(session_id)
-        context.set_code(grpc.StatusCode.OK)
-        return user.to_grpc_user()
+        grpc_user = self._session_cache.get(session_id)
+        if grpc_user is None:
+            session_generation = self._session_generation
+            user = await self._user_repository.get_user_by_session_id(session_id)
+            grpc_user = user.to_grpc_user()
+            # Sessions invalidated while the user was being fetched must not be cached again
+            if session_generation == self._session_generation:
+                self._session_cache.set(session_id, grpc_user)
+        context.set_code(_OK_STATUS)
+        return grpc_user
 
     async def get_new_access_token(
         self,
@@ -200,15 +284,21 @@ class IdentityServiceImpl(GrpcServicer):
         get_access_token_proto.GetNewAccessTokenResponse
             Response object with new access token
 
+        Raises
+        ------
+        ValueNotFoundError
+            Session not found
+
         """
-        user_id, session_id = self._jwt_controller.decode(
+        user_id, session_id = self._decode_token(
             request.refresh_token, TokenType.REFRESH_TOKEN
         )
-        await self._user_repository.get_user_by_session_id(session_id=session_id)
+        if not await self._token_repository.exists_session(session_id=session_id):
+            raise ValueNotFoundError("Session not found")
         access_token = self._jwt_controller.generate_access_token(
             user_id=user_id, session_id=session_id
         )
-        context.set_code(grpc.StatusCode.OK)
+        context.set_code(_OK_STATUS)
         return get_access_token_proto.GetNewAccessTokenResponse(
             access_token=access_token
         )
@@ -235,7 +325,7 @@ class IdentityServiceImpl(GrpcServicer):
 
         """
         user = await self._user_repository.get_user_by_email(request.email)
-        context.set_code(grpc.StatusCode.OK)
+        context.set_code(_OK_STATUS)
         return user.to_grpc_user()
 
     async def get_user_by_id(
@@ -257,9 +347,13 @@ class IdentityServiceImpl(GrpcServicer):
             Response object with public user data
 
         """
-        user = await self._user_repository.get_user_by_id(request.user_id)
-        context.set_code(grpc.StatusCode.OK)
-        return user.to_grpc_user()
+        grpc_user = self._user_cache.get(request.user_id)
+        if grpc_user is None:
+            user = await self._user_repository.get_user_by_id(request.user_id)
+            grpc_user = user.to_grpc_user()
+            self._user_cache.set(user.id, grpc_user)
+        context.set_code(_OK_STATUS)
+        return grpc_user
 
     async def get_users_by_id(
         self, request: get_user_proto.UsersByIdRequest, context: grpc.ServicerContext
@@ -267,6 +361,8 @@ class IdentityServiceImpl(GrpcServicer):
         """
         Gets user objects that matches given ids
 
+        Unpaginated requests take recently fetched users from the cache and query only the missing ones
+
         Parameters
         ----------
         request : get_user_proto.UsersByIdRequest
@@ -280,15 +376,47 @@ class IdentityServiceImpl(GrpcServicer):
             Response object with array of user data
 
         """
-        users = await self._user_repository.get_users_by_ids(
-            user_ids=list(request.id),
-            page=request.page,
-            items_per_page=request.items_per_page,
-        )
-        context.set_code(grpc.StatusCode.OK)
-        return get_user_proto.ListOfUser(
-            users=[user.to_grpc_user() for user in users]
-        )
+        user_ids = sorted(set(request.id))
+        response = get_user_proto.ListOfUser()
+        if request.items_per_page == -1:
+            response.users.extend(await self._get_users_by_ids_cached(user_ids=user_ids))
+        else:
+            users = await self._user_repository.get_users_by_ids(
+                user_ids=user_ids,
+                page=request.page,
+                items_per_page=request.items_per_page,
+            )
+            for user in users:
+                user.fill_grpc_user(response.users.add())
+        context.set_code(_OK_STATUS)
+        return response
+
+    async def get_users_by_id_stream(
+        self, request: get_user_proto.UsersByIdRequest, context: grpc.ServicerContext
+    ) -> AsyncIterator[user_proto.GrpcUser]:
+        """
+        Streams user objects that matches given ids
+
+        Pagination fields of the request are ignored, all matching users are streamed
+
+        Parameters
+        ----------
+        request : get_user_proto.UsersByIdRequest
+            User ids
+        context : grpc.ServicerContext
+            Request context
+
+        Yields
+        ------
+        user_proto.GrpcUser
+            User data
+
+        """
+        async for user in self._user_repository.iter_users_by_ids(
+            user_ids=sorted(set(request.id))
+        ):
+            yield user.to_grpc_user()
+        context.set_code(_OK_STATUS)
 
     async def get_all_users(
         self, request: get_user_proto.GetAllUsersRequest, context: grpc.ServicerContext
@@ -314,16 +442,48 @@ class IdentityServiceImpl(GrpcServicer):
             Permission denied
 
         """
-        requesting_user = User.from_grpc_user(request.requested_user)
-        if requesting_user.type != UserType.ADMIN:
+        if request.requested_user.type != user_proto.GrpcUserType.ADMIN:
             raise PermissionDeniedError("Permission denied")
         users = await self._user_repository.get_all_users(
             page=request.page, items_per_page=request.items_per_page
         )
-        context.set_code(grpc.StatusCode.OK)
-        return get_user_proto.ListOfUser(
-            users=[user.to_grpc_user() for user in users]
-        )
+        context.set_code(_OK_STATUS)
+        response = get_user_proto.ListOfUser()
+        for user in users:
+            user.fill_grpc_user(response.users.add())
+        return response
+
+    async def get_all_users_stream(
+        self, request: get_user_proto.GetAllUsersRequest, context: grpc.ServicerContext
+    ) -> AsyncIterator[user_proto.GrpcUser]:
+        """
+        Stream all existing users
+
+        Pagination fields of the request are ignored, all users are streamed
+
+        Parameters
+        ----------
+        request : get_user_proto.GetAllUsersRequest
+            Requesting user's data
+        context : grpc.ServicerContext
+            Request context
+
+        Yields
+        ------
+        user_proto.GrpcUser
+            User data
+
+        Raises
+        ------
+        PermissionDeniedError
+            Permission denied
+
+        """
+        if request.requested_user.type != user_proto.GrpcUserType.ADMIN:
+            raise PermissionDeniedError("Permission denied")
+        async for user in self._user_repository.iter_all_users():
+            yield user.to_grpc_user()
+        context.set_code(_OK_STATUS)
 
     async def update_user(
         self,
@@ -349,40 +509,48 @@ class IdentityServiceImpl(GrpcServicer):
         ------
         PermissionDeniedError
             Permission denied
+        ValueNotFoundError
+            New password is longer than 256 bytes
 
         """
         user = User.from_modify_grpc_user(grpc_user=request.new_user)
-        requesting_user = User.from_grpc_user(request.requesting_user)
+        requesting_user = request.requesting_user
         db_user = await self._user_repository.get_user_by_id(user_id=user.id)
 
-        if requesting_user.type != UserType.ADMIN and user.id != requesting_user.id:
+        if requesting_user.type != user_proto.GrpcUserType.ADMIN and user.id != requesting_user.id:
             raise PermissionDeniedError("Permission denied")
 
-        if requesting_user.type != UserType.ADMIN and db_user.type != UserType.ADMIN and user.type == UserType.ADMIN:
+        if (
+            requesting_user.type != user_proto.GrpcUserType.ADMIN
+            and db_user.type != UserType.ADMIN
+            and user.type == UserType.ADMIN
+        ):
             raise PermissionDeniedError("Permission denied")
 
         if request.new_user.WhichOneof("optional_password") is None:
             user.password = db_user.password
+        elif len(user.password.encode("UTF-8")) > _MAX_PASSWORD_BYTES:
+            raise ValueNotFoundError("Invalid password")
         else:
-            user.password = self._encoder.encode(password=user.password)
-
-        user = await self._user_repository.update_user(user=user)
-        await self._token_repository.delete_all_refresh_tokens(user_id=user.id)
+            user.password = await asyncio.get_running_loop().run_in_executor(
+                self._bcrypt_pool, self._encoder.encode, user.password
+            )
 
-        session_id = str(uuid4())
+        session_id = secrets.token_hex(16)
         access_token, refresh_token = self._generate_tokens(
             session_id=session_id, user_id=user.id
         )
-        await self._token_repository.store_refresh_token(
-            refresh_token=refresh_token, session_id=session_id, user_id=user.id
-        )
-
-        context.set_code(grpc.StatusCode.OK)
-        return auth_proto.CredentialsResponse(
-            data=auth_proto.LoginData(
-                access_token=access_token, refresh_token=refresh_token
-            ),
-            user=user.to_grpc_user()
+        try:
+            user = await self._user_repository.update_user(user=user)
+            await self._token_repository.replace_refresh_tokens(
+                refresh_token=refresh_token, session_id=session_id, user_id=user.id
+            )
+        finally:
+            self._forget_user(user_id=user.id)
+
+        context.set_code(_OK_STATUS)
+        return self._credentials_response(
+            access_token=access_token, refresh_token=refresh_token, user=user
         )
 
     async def delete_user(
@@ -411,14 +579,16 @@ class IdentityServiceImpl(GrpcServicer):
             Permission denied
 
         """
-        requesting_user = User.from_grpc_user(request.requesting_user)
+        requesting_user = request.requesting_user
         user = await self._user_repository.get_user_by_id(request.user_id)
-        if requesting_user.type != UserType.ADMIN and requesting_user.id != user.id:
+        if requesting_user.type != user_proto.GrpcUserType.ADMIN and requesting_user.id != user.id:
             raise PermissionDeniedError("Permission denied")
-        await self._token_repository.delete_all_refresh_tokens(user_id=request.user_id)
-        await self._user_repository.delete_user(user_id=request.user_id)
-        context.set_code(grpc.StatusCode.OK)
-        return Empty()
+        try:
+            await self._user_repository.delete_user_with_tokens(user_id=request.user_id)
+        finally:
+            self._forget_user(user_id=request.user_id)
+        context.set_code(_OK_STATUS)
+        return _EMPTY_RESPONSE
 
     async def logout(
         self, request: auth_proto.AccessToken, context: grpc.ServicerContext
@@ -439,12 +609,32 @@ class IdentityServiceImpl(GrpcServicer):
             Empty response
 
         """
-        _, session_id = self._jwt_controller.decode(
+        _, session_id = self._decode_token(
             token=request.access_token, token_type=TokenType.ACCESS_TOKEN
         )
         await self._token_repository.delete_refresh_token(session_id=session_id)
-        context.set_code(grpc.StatusCode.OK)
-        return Empty()
+        self._session_cache.pop(session_id)
+        self._session_generation += 1
+        context.set_code(_OK_STATUS)
+        return _EMPTY_RESPONSE
+
+    async def warmup(self) -> None:
+        """
+        Open database connections before serving requests
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        await asyncio.gather(
+            self._user_repository.ping(), self._token_repository.ping()
+        )
+
+    def close(self) -> None:
+        """Release resources held by the service"""
+        self._bcrypt_pool.shutdown(cancel_futures=True)
 
     def _generate_tokens(self, session_id: str, user_id: str) -> Tuple[str, str]:
         """
@@ -463,10 +653,152 @@ class IdentityServiceImpl(GrpcServicer):
             Access and refresh tokens
 
         """
-        access_token = self._jwt_controller.generate_access_token(
+        return self._jwt_controller.generate_tokens(
             user_id=user_id, session_id=session_id
         )
-        refresh_token = self._jwt_controller.generate_refresh_token(
-            user_id=user_id, session_id=session_id
+
+    @staticmethod
+    def _credentials_response(
+        access_token: str, refresh_token: str, user: User
+    ) -> auth_proto.CredentialsResponse:
+        """
+        Build credentials response
+
+        Fields are assigned in place instead of passing nested messages to the constructors
+
+        Parameters
+        ----------
+        access_token : str
+            Access token
+        refresh_token : str
+            Refresh token
+        user : User
+            User the tokens were issued for
+
+        Returns
+        -------
+        auth_proto.CredentialsResponse
+            Response object with credentials and user's data
+
+        """
+        response = auth_proto.CredentialsResponse()
+        response.data.access_token = access_token
+        response.data.refresh_token = refresh_token
+        user.fill_grpc_user(response.user)
+        return response
+
+    async def _check_password(self, password: str, hashed_password: str) -> bool:
+        """
+        Compare password with its hash using recently verified passwords cache
+
+        Only successful checks are cached, under an HMAC of the password and the hash keyed with a per-process
+        secret, so plaintext passwords are never stored and a changed hash never matches an old entry
+
+        Parameters
+        ----------
+        password : str
+            Unhashed password
+        hashed_password : str
+            Hashed password
+
+        Returns
+        -------
+        bool
+            Flag if passwords are matching
+
+        """
+        key = hmac.new(
+            self._password_cache_key,
+            password.encode("UTF-8") + b"\0" + hashed_password.encode("UTF-8"),
+            hashlib.sha256,
+        ).digest()
+        if self._password_cache.get(key):
+            return True
+        password_matches = await asyncio.get_running_loop().run_in_executor(
+            self._bcrypt_pool, self._encoder.compare, password, hashed_password
         )
-        return access_token, refresh_token
+        if password_matches:
+            self._password_cache.set(key, True)
+        return password_matches
+
+    def _decode_token(self, token: str, token_type: TokenType) -> Tuple[str, str]:
+        """
+        Decode token using recently decoded tokens cache
+
+        Cached tokens are trusted for a few seconds at most and never after their expiration time. Tokens are
+        keyed by their 128-bit BLAKE2b digest, so the cache does not keep the tokens themselves
+
+        Parameters
+        ----------
+        token : str
+            Token to decode
+        token_type : TokenType
+            Token type
+
+        Returns
+        -------
+        Tuple[str, str]
+            User's id and session id
+
+        Raises
+        ------
+        InvalidTokenError
+            Token is invalid
+
+        """
+        key = (hashlib.blake2b(token.encode("UTF-8"), digest_size=16).digest(), token_type)
+        cached = self._token_cache.get(key)
+        if cached is not None:
+            return cached
+        user_id, session_id, expiration = self._jwt_controller.decode_with_expiration(
+            token, token_type
+        )
+        self._token_cache.set(
+            key, (user_id, session_id), ttl=expiration - time.time()
+        )
+        return user_id, session_id
+
+    async def _get_users_by_ids_cached(self, user_ids: List[str]) -> List[user_proto.GrpcUser]:
+        """
+        Get users by ids, querying the repository only for users missing in the cache
+
+        Parameters
+        ----------
+        user_ids : List[str]
+            Sorted unique user ids
+
+        Returns
+        -------
+        List[user_proto.GrpcUser]
+            Found users in the order of provided ids
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        cached_users = {user_id: self._user_cache.get(user_id) for user_id in user_ids}
+        missing_ids = [user_id for user_id, grpc_user in cached_users.items() if grpc_user is None]
+        if missing_ids:
+            for user in await self._user_repository.get_users_by_ids(
+                user_ids=missing_ids, page=1, items_per_page=-1
+            ):
+                grpc_user = user.to_grpc_user()
+                self._user_cache.set(user.id, grpc_user)
+                cached_users[user.id] = grpc_user
+        return [grpc_user for grpc_user in cached_users.values() if grpc_user is not None]
+
+    def _forget_user(self, user_id: str) -> None:
+        """
+        Remove user and user's sessions from the caches
+
+        Parameters
+        ----------
+        user_id : str
+            Id of the user
+
+        """
+        self._user_cache.pop(user_id)
+        self._session_cache.pop_matching(lambda user: user.id == user_id)
+        self._session_generation += 1
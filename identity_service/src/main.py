@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import multiprocessing
 import os
 import sys
 
@@ -8,36 +9,44 @@ import grpc
 from db import PostgresClient
 from src.identity_service_impl import IdentityServiceImpl
 from src.repository import MockTokenRepositoryImpl, MockUserRepositoryImpl, TokenRepositoryImpl, UserRepositoryImpl
-from src.utilities import CustomInterceptor, JwtController
+from src.utilities import CustomInterceptor, Encoder, JwtController
 import src.generated.identity_service.identity_service_pb2_grpc as identity_service_grpc
 
 import dotenv
+import uvloop
 
 
 async def serve() -> None:
     """Start an async server"""
-    server = grpc.aio.server(interceptors=[CustomInterceptor()])
+    server = grpc.aio.server(
+        interceptors=[CustomInterceptor()], options=[("grpc.so_reuseport", 1)]
+    )
     dotenv.load_dotenv()
     if os.environ["ENVIRONMENT"] == "PRODUCTION":
         await PostgresClient().connect()
+    identity_service = IdentityServiceImpl(
+        user_repository=UserRepositoryImpl()
+        if os.environ["ENVIRONMENT"] == "PRODUCTION"
+        else MockUserRepositoryImpl(),
+        token_repository=TokenRepositoryImpl()
+        if os.environ["ENVIRONMENT"] == "PRODUCTION"
+        else MockTokenRepositoryImpl(),
+    )
     identity_service_grpc.add_IdentityServiceServicer_to_server(
-        IdentityServiceImpl(
-            user_repository=UserRepositoryImpl()
-            if os.environ["ENVIRONMENT"] == "PRODUCTION"
-            else MockUserRepositoryImpl(),
-            token_repository=TokenRepositoryImpl()
-            if os.environ["ENVIRONMENT"] == "PRODUCTION"
-            else MockTokenRepositoryImpl(),
-        ),
+        identity_service,
         server,
     )
     server.add_insecure_port("0.0.0.0:8080")
     JwtController()
+    await identity_service.warmup()
     await server.start()
     logging.info(
-        f"Server started on http://localhost:8080 with environment {os.environ['ENVIRONMENT']}"
+        "Server started on http://localhost:8080 with environment %s", os.environ["ENVIRONMENT"]
     )
-    await server.wait_for_termination()
+    try:
+        await server.wait_for_termination()
+    finally:
+        identity_service.close()
 
 
 async def handle_serve_error() -> None:
@@ -50,8 +59,24 @@ async def handle_serve_error() -> None:
         await PostgresClient().disconnect()
 
 
+def run() -> None:
+    """Run the server in the current process"""
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    asyncio.run(handle_serve_error())
+
+
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.INFO, handlers=[logging.StreamHandler(sys.stdout)]
     )
-    asyncio.run(handle_serve_error())
+    dotenv.load_dotenv()
+    if "BCRYPT_COST" not in os.environ:
+        # Calibrated once so every worker hashes with the same cost, workers inherit the environment
+        os.environ["BCRYPT_COST"] = str(Encoder.calibrate_rounds())
+    workers = [
+        multiprocessing.Process(target=run, daemon=True)
+        for _ in range(int(os.environ.get("WORKERS", 1)) - 1)
+    ]
+    for worker in workers:
+        worker.start()
+    run()
@@ -1,15 +1,19 @@
 """User Model"""
 
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
 from enum import StrEnum
 from typing import Any, List, Optional, Self
+import sys
 
 from prisma.models import User as PrismaUser
 
 from src.generated.identity_service.update_user_pb2 import UserToModify as GrpcUserToModify
 from src.generated.user.user_pb2 import GrpcUser, GrpcUserType
 
+_LOCAL_TZ = datetime.now().astimezone().tzinfo
+"""Local timezone of the server, assumed for naive datetimes"""
+
 
 class UserType(StrEnum):
     """
@@ -42,10 +46,16 @@ class UserType(StrEnum):
             UserType enum instance
 
         """
-        return cls("USER") if grpc_user_type == GrpcUserType.USER else cls("ADMIN")
+        return _GRPC_TO_USER_TYPE.get(grpc_user_type, cls.ADMIN)
+
 
+_GRPC_TO_USER_TYPE = {GrpcUserType.USER: UserType.USER, GrpcUserType.ADMIN: UserType.ADMIN}
+"""User types by grpc user type"""
+_USER_TYPE_TO_GRPC = {UserType.USER: GrpcUserType.USER, UserType.ADMIN: GrpcUserType.ADMIN}
+"""Grpc user types by user type"""
 
-@dataclass
+
+@dataclass(slots=True)
 class User:
     """
     Data class that stores user information
@@ -71,8 +81,12 @@ class User:
     -------
     to_grpc_user()
         Returns user's information as a GrpcUser class instance
+    fill_grpc_user(grpc_user)
+        Writes user's information into existing GrpcUser class instance
     from_prisma_user(prisma_user)
         Returns user class instance from PrismaUser
+    from_prisma_users(prisma_users)
+        Returns user class instances from list of PrismaUser
     to_dict()
         Returns user's data represented in dictionary
     from_update_grpc_user(grpc_user)
@@ -100,19 +114,33 @@ class User:
             User data in GrpcUser instance
 
         """
-        user = GrpcUser(
-            id=self.id,
-            username=self.username,
-            email=self.email,
-            type=(
-                GrpcUserType.USER if self.type == UserType.USER else GrpcUserType.ADMIN
-            ),
-            suspended_at=None,
+        user = GrpcUser()
+        self.fill_grpc_user(user)
+        return user
+
+    def fill_grpc_user(self, grpc_user: GrpcUser) -> None:
+        """
+        Writes user information into existing GrpcUser
+
+        Parameters
+        ----------
+        grpc_user : GrpcUser
+            GrpcUser instance to fill, e.g. a submessage of the response
+
+        """
+        grpc_user.id = self.id
+        grpc_user.username = self.username
+        grpc_user.email = self.email
+        grpc_user.type = _USER_TYPE_TO_GRPC[self.type]
+        grpc_user.created_at.FromDatetime(
+            self.created_at if self.created_at.tzinfo is not None else self.created_at.replace(tzinfo=_LOCAL_TZ)
         )
-        user.created_at.FromNanoseconds(int(self.created_at.replace(tzinfo=datetime.now().tzinfo).timestamp() * 1e9))
         if self.suspended_at is not None:
-            user.suspended_at.FromNanoseconds(int(self.suspended_at.replace(tzinfo=datetime.now().tzinfo).timestamp() * 1e9))
-        return user
+            grpc_user.suspended_at.FromDatetime(
+                self.suspended_at
+                if self.suspended_at.tzinfo is not None
+                else self.suspended_at.replace(tzinfo=_LOCAL_TZ)
+            )
 
     @classmethod
     def from_prisma_user(cls, prisma_user: PrismaUser) -> Self:
@@ -131,7 +159,7 @@ class User:
 
         """
         return cls(
-            id=prisma_user.id,
+            id=sys.intern(prisma_user.id),
             username=prisma_user.username,
             email=prisma_user.email,
             password=prisma_user.password,
@@ -140,6 +168,38 @@ class User:
             suspended_at=prisma_user.suspended_at,
         )
 
+    @classmethod
+    def from_prisma_users(cls, prisma_users: List[PrismaUser]) -> List[Self]:
+        """
+        Returns user class instances from list of PrismaUser
+
+        Fields are passed positionally to skip keyword binding for every row of large query results,
+        ids are interned so users loaded repeatedly share one id string
+
+        Parameters
+        ----------
+        prisma_users : List[PrismaUser]
+            Prisma users
+
+        Returns
+        -------
+        List[User]
+            User class instances in the same order
+
+        """
+        return [
+            cls(
+                sys.intern(prisma_user.id),
+                prisma_user.username,
+                prisma_user.email,
+                prisma_user.password,
+                UserType(prisma_user.type),
+                prisma_user.created_at,
+                prisma_user.suspended_at,
+            )
+            for prisma_user in prisma_users
+        ]
+
     def to_dict(self, exclude: Optional[List[str]] = None) -> dict[str, Any]:
         """
         Get user data represented in dictionary
@@ -156,11 +216,10 @@ class User:
 
         """
         exclude_set = set(exclude if exclude is not None else []) | {"id"}
-        attrs = vars(self)
         obj = {
-            attr.lstrip("_"): value
-            for attr, value in attrs.items()
-            if attr not in exclude_set
+            field.name.lstrip("_"): getattr(self, field.name)
+            for field in fields(self)
+            if field.name not in exclude_set
         }
         obj["type"] = str(self.type)
         return obj
@@ -187,13 +246,9 @@ class User:
             password=grpc_user.password if grpc_user.WhichOneof("optional_password") is not None else "",
             email=grpc_user.email,
             type=UserType.from_grpc_user_type(grpc_user.type),
-            created_at=datetime.utcfromtimestamp(
-                grpc_user.created_at.seconds + grpc_user.created_at.nanos / 1e9
-            ),
+            created_at=grpc_user.created_at.ToDatetime(tzinfo=timezone.utc),
             suspended_at=(
-                datetime.utcfromtimestamp(
-                    grpc_user.suspended_at.seconds + grpc_user.suspended_at.nanos / 1e9
-                )
+                grpc_user.suspended_at.ToDatetime(tzinfo=timezone.utc)
                 if grpc_user.WhichOneof("optional_suspended_at") is not None
                 else None
             ),
@@ -221,22 +276,20 @@ class User:
             password="",
             email=grpc_user.email,
             type=UserType.from_grpc_user_type(grpc_user.type),
-            created_at=datetime.utcfromtimestamp(
-                grpc_user.created_at.seconds + grpc_user.created_at.nanos / 1e9
-            ),
+            created_at=grpc_user.created_at.ToDatetime(tzinfo=timezone.utc),
             suspended_at=(
-                datetime.utcfromtimestamp(
-                    grpc_user.suspended_at.seconds + grpc_user.suspended_at.nanos / 1e9
-                )
+                grpc_user.suspended_at.ToDatetime(tzinfo=timezone.utc)
                 if grpc_user.WhichOneof("optional_suspended_at") is not None
                 else None
             ),
         )
 
     def __eq__(self, other: object) -> bool:
+        if other is self:
+            return True
         if not isinstance(other, User):
             return NotImplemented
         return self.id == other.id
 
     def __repr__(self) -> str:
-        return f"{vars(self)}"
+        return f"User(id={self.id!r})"
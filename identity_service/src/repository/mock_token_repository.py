@@ -25,6 +25,12 @@ class MockTokenRepositoryImpl(TokenRepositoryInterface):
         Deletes refresh token corresponding to provided session_id
     async delete_all_refresh_tokens(user_id)
         Deletes all user's refresh tokens
+    async replace_refresh_tokens(refresh_token, session_id, user_id)
+        Deletes all user's refresh tokens and stores the new one
+    async exists_session(session_id)
+        Check if session with provided id exists
+    async ping()
+        Check that the database is reachable
 
     """
 
@@ -122,3 +128,42 @@ class MockTokenRepositoryImpl(TokenRepositoryInterface):
             self._tokens.pop(user_id)
         except KeyError:
             raise ValueNotFoundError("User not found")
+
+    async def replace_refresh_tokens(
+        self, refresh_token: str, session_id: str, user_id: str
+    ) -> None:
+        """
+        Delete all user's refresh tokens and store the new one
+
+        Parameters
+        ----------
+        refresh_token : str
+            User's new refresh token
+        session_id : str
+            Id of the new session
+        user_id : str
+            Id of the current user
+
+        """
+        self._tokens[user_id] = {session_id: refresh_token}
+
+    async def exists_session(self, session_id: str) -> bool:
+        """
+        Check if session with provided id exists
+
+        Parameters
+        ----------
+        session_id : str
+            Id of the session
+
+        Returns
+        -------
+        bool
+            Flag if the session exists
+
+        """
+        return any(session_id in sessions for sessions in self._tokens.values())
+
+    async def ping(self) -> None:
+        """Check that the database is reachable, used to warm up the connection on startup"""
+        pass
@@ -1,6 +1,7 @@
 """Mock User Repository"""
 from datetime import datetime
-from typing import List
+from itertools import islice
+from typing import AsyncIterator, Dict, List
 from uuid import uuid4
 
 from errors import UniqueError, ValueNotFoundError
@@ -18,8 +19,16 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
 
     Attributes
     ----------
-    _users : List[User]
-        List of users
+    _users_by_id : Dict[str, User]
+        Users by id in the order of creation
+    _users_by_email : Dict[str, User]
+        Users by email
+    _users_by_username : Dict[str, User]
+        Users by username
+    _token_repository : MockTokenRepositoryImpl
+        Mock token repository that stores users' sessions
+    _jwt_controller : JwtController
+        Jwt controller used to decode refresh tokens
 
     Methods
     -------
@@ -29,23 +38,39 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
         Returns user that has matching id from database
     async get_users_by_ids(user_ids)
         Returns users that has matching ids from database
+    async iter_users_by_ids(user_ids)
+        Yields users that has matching ids from database
     async create_user(user)
         Creates new user inside db or throws an exception
     async update_user(user)
         Updates user that has the same id as provided user object inside db
     async delete_user(user_id)
         Deletes user that has matching id from database
+    async delete_user_with_tokens(user_id)
+        Deletes user that has matching id and all user's refresh tokens in one transaction
     async get_all_users()
         Returns all existing users
+    async iter_all_users()
+        Yields all existing users
     async get_user_by_session_id(session_id)
         Get user with matching session id
+    async ping()
+        Check that the database is reachable
 
     """
 
-    _users: List[User]
+    _users_by_id: Dict[str, User]
+    _users_by_email: Dict[str, User]
+    _users_by_username: Dict[str, User]
+    _token_repository: MockTokenRepositoryImpl
+    _jwt_controller: JwtController
 
     def __init__(self) -> None:
-        self._users = []
+        self._users_by_id = {}
+        self._users_by_email = {}
+        self._users_by_username = {}
+        self._token_repository = MockTokenRepositoryImpl()
+        self._jwt_controller = JwtController()
 
     async def get_user_by_email(self, email: str) -> User:
         """
@@ -67,14 +92,10 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             User does not exist
 
         """
-        try:
-            return next(
-                user
-                for user in self._users
-                if user.email == email and user.suspended_at is None
-            )
-        except StopIteration:
+        user = self._users_by_email.get(email)
+        if user is None or user.suspended_at is not None:
             raise ValueNotFoundError("No user found for this id")
+        return user
 
     async def get_user_by_id(self, user_id: str) -> User:
         """
@@ -96,14 +117,10 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             User does not exist
 
         """
-        try:
-            return next(
-                user
-                for user in self._users
-                if user.id == user_id and user.suspended_at is None
-            )
-        except StopIteration:
+        user = self._users_by_id.get(user_id)
+        if user is None or user.suspended_at is not None:
             raise ValueNotFoundError("No user found for this id")
+        return user
 
     async def get_users_by_ids(
         self, user_ids: List[str], page: int, items_per_page: int
@@ -128,8 +145,8 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
         """
         values = [
             user
-            for user in self._users
-            if user.id in user_ids and user.suspended_at is None
+            for user in map(self._users_by_id.get, dict.fromkeys(user_ids))
+            if user is not None and user.suspended_at is None
         ]
 
         return (
@@ -138,6 +155,25 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             else values
         )
 
+    async def iter_users_by_ids(self, user_ids: List[str]) -> AsyncIterator[User]:
+        """
+        Yields users that has matching ids from database
+
+        Parameters
+        ----------
+        user_ids : List[str]
+            User's ids
+
+        Yields
+        ------
+        User
+            User that has matching id
+
+        """
+        for user in map(self._users_by_id.get, dict.fromkeys(user_ids)):
+            if user is not None and user.suspended_at is None:
+                yield user
+
     async def create_user(self, user: User) -> User:
         """
         Creates user with matching data or throws an exception
@@ -158,22 +194,16 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             Another user with this data already exists
 
         """
-        if (
-            len(
-                [
-                    True
-                    for userdb in self._users
-                    if (userdb.username == user.username or user.email == userdb.email)
-                    and user.suspended_at is None
-                ]
-            )
-            != 0
+        if user.suspended_at is None and (
+            user.username in self._users_by_username or user.email in self._users_by_email
         ):
             raise UniqueError("User with this data already exists")
 
         user.id = str(uuid4())
         user.created_at = datetime.utcnow()
-        self._users.append(user)
+        self._users_by_id[user.id] = user
+        self._users_by_email[user.email] = user
+        self._users_by_username[user.username] = user
         return user
 
     async def update_user(self, user: User) -> User:
@@ -194,14 +224,24 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
         ------
         ValueNotFoundError
             Can't update user with provided data
+        UniqueError
+            Another user with this data already exists
 
         """
-        try:
-            index: int = self._users.index(user)
-            self._users[index] = user
-            return user
-        except ValueError:
+        old_user = self._users_by_id.get(user.id)
+        if old_user is None:
             raise ValueNotFoundError("No user found")
+        for other_user in (self._users_by_username.get(user.username), self._users_by_email.get(user.email)):
+            if other_user is not None and other_user.id != user.id and other_user.suspended_at is None:
+                raise UniqueError("User with this email or username already exists")
+        if self._users_by_email.get(old_user.email) is old_user:
+            del self._users_by_email[old_user.email]
+        if self._users_by_username.get(old_user.username) is old_user:
+            del self._users_by_username[old_user.username]
+        self._users_by_id[user.id] = user
+        self._users_by_email[user.email] = user
+        self._users_by_username[user.username] = user
+        return user
 
     async def delete_user(self, user_id: str) -> None:
         """
@@ -218,15 +258,28 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             Can't delete user with provided data
 
         """
-        try:
-            index = next(
-                i
-                for i in range(len(self._users))
-                if self._users[i].id == user_id and self._users[i].suspended_at is None
-            )
-            self._users[index].suspended_at = datetime.utcnow()
-        except StopIteration:
+        user = self._users_by_id.get(user_id)
+        if user is None or user.suspended_at is not None:
             raise ValueNotFoundError("No user found")
+        user.suspended_at = datetime.utcnow()
+
+    async def delete_user_with_tokens(self, user_id: str) -> None:
+        """
+        Deletes user with matching id and all user's refresh tokens in one transaction
+
+        Parameters
+        ----------
+        user_id : str
+            User's id
+
+        Raises
+        ------
+        ValueNotFoundError
+            Can't delete user with provided data
+
+        """
+        await self._token_repository.delete_all_refresh_tokens(user_id=user_id)
+        await self.delete_user(user_id=user_id)
 
     async def get_all_users(self, page: int, items_per_page: int) -> List[User]:
         """
@@ -246,11 +299,24 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
 
         """
         return (
-            self._users[(page - 1) * items_per_page : page * items_per_page]
+            list(islice(self._users_by_id.values(), max((page - 1) * items_per_page, 0), page * items_per_page))
             if items_per_page != -1
-            else self._users
+            else list(self._users_by_id.values())
         )
 
+    async def iter_all_users(self) -> AsyncIterator[User]:
+        """
+        Yields all existing users
+
+        Yields
+        ------
+        User
+            Existing user
+
+        """
+        for user in list(self._users_by_id.values()):
+            yield user
+
     async def get_user_by_session_id(self, session_id: str) -> User:
         """
         Get user with matching session id
@@ -273,6 +339,10 @@ class MockUserRepositoryImpl(UserRepositoryInterface):
             Refresh token is invalid
 
         """
-        token = await MockTokenRepositoryImpl().get_refresh_token(session_id)
-        user_id, _ = JwtController().decode(token, TokenType.REFRESH_TOKEN)
+        token = await self._token_repository.get_refresh_token(session_id)
+        user_id, _ = self._jwt_controller.decode(token, TokenType.REFRESH_TOKEN)
         return await self.get_user_by_id(user_id)
+
+    async def ping(self) -> None:
+        """Check that the database is reachable, used to warm up the connection on startup"""
+        pass
@@ -26,6 +26,12 @@ class TokenRepositoryImpl(TokenRepositoryInterface):
         Deletes refresh token corresponding to provided user_id
     async delete_all_refresh_tokens(user_id)
         Delete all user's refresh tokens
+    async replace_refresh_tokens(refresh_token, session_id, user_id)
+        Delete all user's refresh tokens and store the new one
+    async exists_session(session_id)
+        Check if session with provided id exists
+    async ping()
+        Check that the database is reachable
 
     """
 
@@ -123,3 +129,67 @@ class TokenRepositoryImpl(TokenRepositoryInterface):
 
         """
         await self._postgres_client.db.token.delete_many(where={"user_id": user_id})
+
+    async def replace_refresh_tokens(
+        self, refresh_token: str, session_id: str, user_id: str
+    ) -> None:
+        """
+        Delete all user's refresh tokens and store the new one in a single batch
+
+        Parameters
+        ----------
+        refresh_token : str
+            User's new refresh token
+        session_id : str
+            Id of the new session
+        user_id : str
+            Id of the current user
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        async with self._postgres_client.db.batch_() as batcher:
+            batcher.token.delete_many(where={"user_id": user_id})
+            batcher.token.create(
+                data={"id": session_id, "token": refresh_token, "user_id": user_id}
+            )
+
+    async def exists_session(self, session_id: str) -> bool:
+        """
+        Check if session with provided id exists without loading its data
+
+        Parameters
+        ----------
+        session_id : str
+            Id of the session
+
+        Returns
+        -------
+        bool
+            Flag if the session exists
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        session_counter: int = await self._postgres_client.db.token.count(
+            where={"id": session_id}
+        )
+        return session_counter > 0
+
+    async def ping(self) -> None:
+        """
+        Check that the database is reachable, used to warm up the connection on startup
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        await self._postgres_client.db.execute_raw("SELECT 1")
@@ -15,6 +15,14 @@ class TokenRepositoryInterface(ABC):
         Stores refresh token in Redis database
     async delete_refresh_token(user_id)
         Deletes refresh token corresponding to provided user_id
+    async delete_all_refresh_tokens(user_id)
+        Deletes all user's refresh tokens
+    async replace_refresh_tokens(refresh_token, session_id, user_id)
+        Deletes all user's refresh tokens and stores the new one
+    async exists_session(session_id)
+        Check if session with provided id exists
+    async ping()
+        Check that the database is reachable
 
     """
 
@@ -102,3 +110,63 @@ class TokenRepositoryInterface(ABC):
 
         """
         pass
+
+    @abstractmethod
+    async def replace_refresh_tokens(
+        self, refresh_token: str, session_id: str, user_id: str
+    ) -> None:
+        """
+        Delete all user's refresh tokens and store the new one
+
+        Parameters
+        ----------
+        refresh_token : str
+            User's new refresh token
+        session_id : str
+            Id of the new session
+        user_id : str
+            Id of the current user
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
+
+    @abstractmethod
+    async def exists_session(self, session_id: str) -> bool:
+        """
+        Check if session with provided id exists
+
+        Parameters
+        ----------
+        session_id : str
+            Id of the session
+
+        Returns
+        -------
+        bool
+            Flag if the session exists
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """
+        Check that the database is reachable, used to warm up the connection on startup
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
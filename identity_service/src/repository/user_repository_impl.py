@@ -1,7 +1,8 @@
 """User repository with data from database"""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
 
 from prisma.models import User as PrismaUser
 
@@ -21,6 +22,12 @@ class UserRepositoryImpl(UserRepositoryInterface):
     ----------
     _db_client : prisma.Client
         Postgres db client
+    _ITER_BATCH_SIZE : int
+        Number of users fetched by one query while iterating
+    _QUERY_BATCH_SIZE : int
+        Number of ids looked up by one of the concurrent queries of a long unpaginated request
+    _MAX_CONCURRENT_QUERIES : int
+        Number of concurrent queries one unpaginated request may run
 
     Methods
     -------
@@ -30,20 +37,33 @@ class UserRepositoryImpl(UserRepositoryInterface):
         Returns user that has matching id from database
     async get_users_by_ids(user_ids)
         Returns users that has matching ids from database
+    async iter_users_by_ids(user_ids)
+        Yields users that has matching ids from database in batches
     async create_user(user)
         Creates new user inside database
     async update_user(user)
         Updates user that has the same id as provided user object inside db
     async delete_user(user_id)
         Deletes user that has matching id from database
+    async delete_user_with_tokens(user_id)
+        Deletes user that has matching id and all user's refresh tokens in one transaction
     async get_all_users()
         Get all existing users from database
+    async iter_all_users()
+        Yields all existing users from database in batches
     async get_user_by_session_id(session_id)
         Get user by session id
+    async ping()
+        Check that the database is reachable
 
     """
 
     _db_client: PostgresClient
+    _ITER_BATCH_SIZE = 100
+    _QUERY_BATCH_SIZE = 500
+    # Every concurrent query holds a connection from the Prisma pool, which is sized by connection_limit
+    # in DATABASE_URL, so one request must not take all of them
+    _MAX_CONCURRENT_QUERIES = 4
 
     def __init__(self) -> None:
         self._db_client = PostgresClient()
@@ -70,10 +90,8 @@ class UserRepositoryImpl(UserRepositoryInterface):
             No user was found for given email
 
         """
-        db_user: Optional[PrismaUser] = await self._db_client.db.user.find_first(
-            where={"email": email, "suspended_at": None}
-        )
-        if db_user is None:
+        db_user: Optional[PrismaUser] = await self._db_client.db.user.find_unique(where={"email": email})
+        if db_user is None or db_user.suspended_at is not None:
             raise ValueNotFoundError("User not found")
         return User.from_prisma_user(db_user)
 
@@ -99,10 +117,8 @@ class UserRepositoryImpl(UserRepositoryInterface):
             No user was found for given email
 
         """
-        db_user: Optional[PrismaUser] = await self._db_client.db.user.find_first(
-            where={"id": user_id, "suspended_at": None}
-        )
-        if db_user is None:
+        db_user: Optional[PrismaUser] = await self._db_client.db.user.find_unique(where={"id": user_id})
+        if db_user is None or db_user.suspended_at is not None:
             raise ValueNotFoundError("User not found")
         return User.from_prisma_user(db_user)
 
@@ -112,6 +128,9 @@ class UserRepositoryImpl(UserRepositoryInterface):
         """
         Returns users that has matching ids from database or throws an exception
 
+        Long unpaginated id lists are split into batches which are queried concurrently,
+        at most _MAX_CONCURRENT_QUERIES at a time
+
         Parameters
         ----------
         user_ids : List[str]
@@ -132,13 +151,63 @@ class UserRepositoryImpl(UserRepositoryInterface):
             Catch all for every exception raised by Prisma Client Python
 
         """
+        if items_per_page == -1 and len(user_ids) > self._QUERY_BATCH_SIZE:
+            semaphore = asyncio.Semaphore(self._MAX_CONCURRENT_QUERIES)
+
+            async def find_batch(batch_ids: List[str]) -> List[PrismaUser]:
+                async with semaphore:
+                    db_users: List[PrismaUser] = await self._db_client.db.user.find_many(
+                        where={"id": {"in": batch_ids}, "suspended_at": None},
+                    )
+                return db_users
+
+            batches = await asyncio.gather(
+                *(
+                    find_batch(user_ids[start : start + self._QUERY_BATCH_SIZE])
+                    for start in range(0, len(user_ids), self._QUERY_BATCH_SIZE)
+                )
+            )
+            return [user for db_users in batches for user in User.from_prisma_users(db_users)]
+
         db_users = await self._db_client.db.user.find_many(
             where={"id": {"in": user_ids}, "suspended_at": None},
             skip=(page - 1) * items_per_page if items_per_page != -1 else None,
             take=items_per_page if items_per_page != -1 else None,
         )
 
-        return [User.from_prisma_user(db_user) for db_user in db_users]
+        return User.from_prisma_users(db_users)
+
+    async def iter_users_by_ids(self, user_ids: List[str]) -> AsyncIterator[User]:
+        """
+        Yields users that has matching ids from database
+
+        Users are fetched in batches so only one batch is held in memory at a time
+
+        Parameters
+        ----------
+        user_ids : List[str]
+            User's ids
+
+        Yields
+        ------
+        User
+            User that has matching id
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        for start in range(0, len(user_ids), self._ITER_BATCH_SIZE):
+            db_users = await self._db_client.db.user.find_many(
+                where={
+                    "id": {"in": user_ids[start : start + self._ITER_BATCH_SIZE]},
+                    "suspended_at": None,
+                },
+            )
+            for user in User.from_prisma_users(db_users):
+                yield user
 
     async def create_user(self, user: User) -> User:
         """
@@ -174,7 +243,9 @@ class UserRepositoryImpl(UserRepositoryInterface):
         )
         if db_user_counter != 0:
             raise UniqueError("User with this email or username already exists")
-        prisma_user_data = await self._db_client.db.user.create(data=user.to_dict(exclude=["deleted_at", "created_at"]))
+        prisma_user_data = await self._db_client.db.user.create(
+            data=user.to_dict(exclude=["deleted_at", "created_at"])
+        )
         return User.from_prisma_user(prisma_user_data)
 
     async def update_user(self, user: User) -> User:
@@ -197,6 +268,8 @@ class UserRepositoryImpl(UserRepositoryInterface):
             Catch all for every exception raised by Prisma Client Python
         UniqueError
             Another user with this data already exists
+        ValueNotFoundError
+            No user was found for given id
 
         """
         db_user_counter = await self._db_client.db.user.count(
@@ -239,6 +312,28 @@ class UserRepositoryImpl(UserRepositoryInterface):
             data={"suspended_at": datetime.utcnow()},
         )
 
+    async def delete_user_with_tokens(self, user_id: str) -> None:
+        """
+        Deletes user with matching id and all user's refresh tokens in one transaction
+
+        Parameters
+        ----------
+        user_id : str
+            User's id
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        async with self._db_client.db.batch_() as batcher:
+            batcher.token.delete_many(where={"user_id": user_id})
+            batcher.user.update_many(
+                where={"id": user_id, "suspended_at": None},
+                data={"suspended_at": datetime.utcnow()},
+            )
+
     async def get_all_users(self, page: int, items_per_page: int) -> List[User]:
         """
         Get all existing users
@@ -265,7 +360,38 @@ class UserRepositoryImpl(UserRepositoryInterface):
             skip=(page - 1) * items_per_page if items_per_page != -1 else None,
             take=items_per_page if items_per_page != -1 else None,
         )
-        return [User.from_prisma_user(user) for user in users]
+        return User.from_prisma_users(users)
+
+    async def iter_all_users(self) -> AsyncIterator[User]:
+        """
+        Yields all existing users
+
+        Users are fetched in batches ordered by id, every next batch starts after the last fetched user
+
+        Yields
+        ------
+        User
+            Existing user
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        last_id: Optional[str] = None
+        while True:
+            db_users = await self._db_client.db.user.find_many(
+                take=self._ITER_BATCH_SIZE,
+                skip=1 if last_id is not None else None,
+                cursor={"id": last_id} if last_id is not None else None,
+                order={"id": "asc"},
+            )
+            for user in User.from_prisma_users(db_users):
+                yield user
+            if len(db_users) < self._ITER_BATCH_SIZE:
+                return
+            last_id = db_users[-1].id
 
     async def get_user_by_session_id(self, session_id: str) -> User:
         """
@@ -298,3 +424,15 @@ class UserRepositoryImpl(UserRepositoryInterface):
         if token is None or token.user is None:
             raise ValueNotFoundError("Session not found")
         return User.from_prisma_user(prisma_user=token.user)
+
+    async def ping(self) -> None:
+        """
+        Check that the database is reachable, used to warm up the connection on startup
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        await self._db_client.db.execute_raw("SELECT 1")
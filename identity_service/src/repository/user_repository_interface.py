@@ -1,7 +1,7 @@
 """User repository interface"""
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import AsyncIterator, List
 
 from src.models import User
 
@@ -18,16 +18,24 @@ class UserRepositoryInterface(ABC):
         Returns user that has matching id from database or throws an exception
     async get_users_by_ids(user_ids)
         Returns users that has matching ids from database or throws an exception
+    iter_users_by_ids(user_ids)
+        Yields users that has matching ids from database or throws an exception
     async create_user(user)
         Creates new user inside db or throws an exception
     async update_user(user)
         Updates user that has the same id as provided user object inside db or throws an exception
     async delete_user(user_id)
         Deletes user that has matching id from database or throws an exception
+    async delete_user_with_tokens(user_id)
+        Deletes user that has matching id and all user's refresh tokens in one transaction
     async get_all_users()
         Get all existing users from database
+    iter_all_users()
+        Yields all existing users from database
     async get_user_by_session_id(session_id)
         Get user by session id
+    async ping()
+        Check that the database is reachable
 
     """
 
@@ -110,6 +118,29 @@ class UserRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def iter_users_by_ids(self, user_ids: List[str]) -> AsyncIterator[User]:
+        """
+        Yields users that has matching ids from database or throws an exception
+
+        Parameters
+        ----------
+        user_ids : List[str]
+            User's ids
+
+        Yields
+        ------
+        User
+            User that has matching id
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
+
     @abstractmethod
     async def create_user(self, user: User) -> User:
         """
@@ -178,6 +209,24 @@ class UserRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    async def delete_user_with_tokens(self, user_id: str) -> None:
+        """
+        Deletes user with matching id and all user's refresh tokens in one transaction
+
+        Parameters
+        ----------
+        user_id : str
+            User's id
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
+
     @abstractmethod
     async def get_all_users(self, page: int, items_per_page: int) -> List[User]:
         """
@@ -203,6 +252,24 @@ class UserRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def iter_all_users(self) -> AsyncIterator[User]:
+        """
+        Yields all existing users
+
+        Yields
+        ------
+        User
+            Existing user
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
+
     @abstractmethod
     async def get_user_by_session_id(self, session_id: str) -> User:
         """
@@ -227,3 +294,16 @@ class UserRepositoryInterface(ABC):
 
         """
         pass
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """
+        Check that the database is reachable, used to warm up the connection on startup
+
+        Raises
+        ------
+        prisma.errors.PrismaError
+            Catch all for every exception raised by Prisma Client Python
+
+        """
+        pass
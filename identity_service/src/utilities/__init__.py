@@ -1,5 +1,6 @@
 from .custom_interceptor import CustomInterceptor
 from .encoder import Encoder
 from .jwt_controller import JwtController, TokenType
+from .ttl_cache import TtlCache
 
-__all__ = ["CustomInterceptor", "Encoder", "JwtController", "TokenType"]
+__all__ = ["CustomInterceptor", "Encoder", "JwtController", "TokenType", "TtlCache"]
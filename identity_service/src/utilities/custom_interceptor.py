@@ -1,6 +1,6 @@
 # mypy: ignore-errors
 """Interceptor decorator"""
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 import logging
 
 import grpc
@@ -11,6 +11,16 @@ from errors import InvalidTokenError, PermissionDeniedError, UniqueError, ValueN
 
 from grpc_interceptor.server import AsyncServerInterceptor
 
+logger = logging.getLogger(__name__)
+
+_STATUS_CODES = {
+    ValueNotFoundError: grpc.StatusCode.NOT_FOUND,
+    InvalidTokenError: grpc.StatusCode.UNAUTHENTICATED,
+    UniqueError: grpc.StatusCode.ALREADY_EXISTS,
+    PermissionDeniedError: grpc.StatusCode.PERMISSION_DENIED,
+}
+_HANDLED_ERRORS = (PrismaError, *_STATUS_CODES)
+
 
 class CustomInterceptor(AsyncServerInterceptor):
     async def intercept(
@@ -38,25 +48,53 @@ class CustomInterceptor(AsyncServerInterceptor):
         Returns the result of method(request_or_iterator)
         """
         try:
-            return await method(request_or_iterator, context)
-        except PrismaError as p_error:
-            logging.error(f"Prisma error: {p_error}")
+            response_or_iterator = method(request_or_iterator, context)
+            if hasattr(response_or_iterator, "__aiter__"):
+                return self._intercept_stream(response_or_iterator, context)
+            return await response_or_iterator
+        except _HANDLED_ERRORS as error:
+            await self._abort(error, context)
+
+    async def _intercept_stream(
+        self, response_iterator: AsyncIterator[Any], context: grpc.ServicerContext
+    ) -> AsyncIterator[Any]:
+        """
+        Map errors raised while streaming responses
+
+        Parameters
+        ----------
+        response_iterator: Responses of the server streaming RPC method.
+        context: The ServicerContext pass by gRPC to the service.
+
+        Returns
+        -------
+        Yields responses of the RPC method
+        """
+        try:
+            async for response in response_iterator:
+                yield response
+        except _HANDLED_ERRORS as error:
+            await self._abort(error, context)
+
+    @staticmethod
+    async def _abort(error: Exception, context: grpc.ServicerContext) -> None:
+        """
+        Abort the RPC with status code matching the error
+
+        Parameters
+        ----------
+        error: Error raised by the RPC method.
+        context: The ServicerContext pass by gRPC to the service.
+        """
+        status_code = next(
+            (_STATUS_CODES[error_type] for error_type in type(error).__mro__ if error_type in _STATUS_CODES),
+            None,
+        )
+        if status_code is None:
+            logger.error("Prisma error: %s", error)
             await context.abort(
                 grpc.StatusCode.UNKNOWN, "Prisma error: Unknown error happened"
             )
-        except ValueNotFoundError as value_not_found_error:
-            logging.error(value_not_found_error)
-            await context.abort(grpc.StatusCode.NOT_FOUND, str(value_not_found_error))
-        except InvalidTokenError as invalid_token_error:
-            logging.error(invalid_token_error)
-            await context.abort(
-                grpc.StatusCode.UNAUTHENTICATED, str(invalid_token_error)
-            )
-        except UniqueError as unique_error:
-            logging.error(unique_error)
-            await context.abort(grpc.StatusCode.ALREADY_EXISTS, str(unique_error))
-        except PermissionDeniedError as permission_denied_error:
-            logging.error(permission_denied_error)
-            await context.abort(
-                grpc.StatusCode.PERMISSION_DENIED, str(permission_denied_error)
-            )
+        else:
+            logger.debug("%s", error)
+            await context.abort(status_code, str(error))
@@ -1,5 +1,9 @@
 """Encoder class"""
 
+import logging
+import os
+import time
+
 from bcrypt import checkpw, gensalt, hashpw
 
 
@@ -7,17 +11,44 @@ class Encoder:
     """
     Encoder class
 
+    Attributes
+    ----------
+    _rounds : int
+        Bcrypt cost factor used to hash new passwords
+
     Methods
     -------
     encode(password)
         Returns hashed password
     compare(password, hashed_password)
         Returns True if passwords match and False if not
+    needs_rehash(hashed_password)
+        Returns True if password was hashed with a lower cost than the current one
+    calibrate_rounds()
+        Returns the largest cost factor which hashing fits into the time budget
+    _rounds_from_env(value)
+        Returns the cost factor set by BCRYPT_COST environment variable
 
     """
 
-    @staticmethod
-    def encode(password: str) -> str:
+    _MIN_ROUNDS = 12
+    _MAX_ROUNDS = 14
+    _BCRYPT_MAX_ROUNDS = 31
+    _HASH_TIME_BUDGET = 0.25
+    _SAMPLE_ROUNDS = 8
+    _SAMPLES = 5
+
+    _rounds: int
+
+    def __init__(self) -> None:
+        self._rounds = (
+            self._rounds_from_env(os.environ["BCRYPT_COST"])
+            if "BCRYPT_COST" in os.environ
+            else self.calibrate_rounds()
+        )
+        logging.info("Hashing passwords with bcrypt cost %s", self._rounds)
+
+    def encode(self, password: str) -> str:
         """
         Hash password
 
@@ -32,7 +63,7 @@ class Encoder:
             Hashed password
 
         """
-        salt = gensalt()
+        salt = gensalt(rounds=self._rounds)
         return str(hashpw(password=password.encode("UTF-8"), salt=salt).decode("UTF-8"))
 
     @staticmethod
@@ -59,3 +90,77 @@ class Encoder:
                 hashed_password=hashed_password.encode("UTF-8"),
             )
         )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Check if password was hashed with a lower cost than the current one
+
+        Hashes are only ever upgraded, a process with a lower cost never weakens hashes made with a higher one
+
+        Parameters
+        ----------
+        hashed_password
+            Hashed password in the modular crypt format, e.g. $2b$12$...
+
+        Returns
+        -------
+        bool
+            Flag if password should be hashed again
+
+        """
+        return int(hashed_password.split("$")[2]) < self._rounds
+
+    @classmethod
+    def _rounds_from_env(cls, value: str) -> int:
+        """
+        Get the cost factor set by BCRYPT_COST environment variable
+
+        Parameters
+        ----------
+        value
+            Value of the environment variable
+
+        Returns
+        -------
+        int
+            Bcrypt cost factor
+
+        Raises
+        ------
+        ValueError
+            Value is not an integer between the minimal cost and the largest cost bcrypt supports
+
+        """
+        rounds = int(value)
+        if not cls._MIN_ROUNDS <= rounds <= cls._BCRYPT_MAX_ROUNDS:
+            raise ValueError(
+                f"BCRYPT_COST must be between {cls._MIN_ROUNDS} and {cls._BCRYPT_MAX_ROUNDS}, got {rounds}"
+            )
+        return rounds
+
+    @classmethod
+    def calibrate_rounds(cls) -> int:
+        """
+        Get the largest cost factor which hashing fits into the time budget
+
+        Hash is timed several times with a low cost and the fastest sample is taken, so a busy host at startup
+        doesn't lower the result. Every next cost doubles the time, the result is never below the minimal cost
+
+        Returns
+        -------
+        int
+            Bcrypt cost factor
+
+        """
+        samples = []
+        for _ in range(cls._SAMPLES):
+            start = time.perf_counter()
+            hashpw(password=b"calibration", salt=gensalt(rounds=cls._SAMPLE_ROUNDS))
+            samples.append(time.perf_counter() - start)
+        rounds = cls._MIN_ROUNDS
+        elapsed = min(samples) * 2 ** (rounds - cls._SAMPLE_ROUNDS)
+        while rounds < cls._MAX_ROUNDS and elapsed * 2 < cls._HASH_TIME_BUDGET:
+            rounds += 1
+            elapsed *= 2
+        logging.info("Calibrated bcrypt cost %s, estimated hash time %.3f s", rounds, elapsed)
+        return rounds
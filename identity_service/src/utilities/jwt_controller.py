@@ -1,14 +1,14 @@
 """Jwt controller"""
 
 from enum import Enum
-from typing import Tuple
-import datetime
+from typing import ClassVar, List, Tuple
 import os
+import time
 
 from errors import InvalidTokenError
 from utils import singleton
 
-from jwt import decode, encode
+from jwt import PyJWT
 from jwt.exceptions import DecodeError, ExpiredSignatureError
 
 
@@ -28,10 +28,18 @@ class JwtController:
 
     Attributes
     ----------
-    _access_key : str
+    _ALGORITHMS : List[str]
+        Algorithms accepted when decoding tokens
+    _jwt : PyJWT
+        Jwt encoder and decoder shared by all tokens
+    _access_key : bytes
         Key to generate access token
-    _refresh_key : str
+    _refresh_key : bytes
         Key to generate refresh token
+    _access_token_lifetime : int
+        Time to live of access token in seconds
+    _refresh_token_lifetime : int
+        Time to live of refresh token in seconds
 
     Methods
     -------
@@ -39,17 +47,28 @@ class JwtController:
         Generate access token for provided user id and session id
     generate_refresh_token(user_id, session_id)
         Generate refresh token for provided user id and session id
+    generate_tokens(user_id, session_id)
+        Generate access and refresh tokens for provided user id and session id
     decode(token, token_type)
         Decode token with provided type or throw an error
+    decode_with_expiration(token, token_type)
+        Decode token with provided type and get its expiration time or throw an error
 
     """
 
-    _access_key: str
-    _refresh_key: str
+    _ALGORITHMS: ClassVar[List[str]] = ["HS256"]
+    _jwt: PyJWT
+    _access_key: bytes
+    _refresh_key: bytes
+    _access_token_lifetime: int
+    _refresh_token_lifetime: int
 
     def __init__(self) -> None:
-        self._access_key = os.environ["ACCESS_SECRET"]
-        self._refresh_key = os.environ["REFRESH_SECRET"]
+        self._jwt = PyJWT()
+        self._access_key = os.environ["ACCESS_SECRET"].encode("UTF-8")
+        self._refresh_key = os.environ["REFRESH_SECRET"].encode("UTF-8")
+        self._access_token_lifetime = int(os.environ["ACCESS_TOKEN_EXPIRATION"]) * 60
+        self._refresh_token_lifetime = int(os.environ["REFRESH_TOKEN_EXPIRATION"]) * 24 * 60 * 60
 
     def generate_access_token(self, user_id: str, session_id: str) -> str:
         """
@@ -68,14 +87,11 @@ class JwtController:
             Access token
 
         """
-        access_token: str = encode(
+        access_token: str = self._jwt.encode(
             {
                 "user_id": user_id,
                 "session_id": session_id,
-                "exp": datetime.datetime.now()
-                + datetime.timedelta(
-                    minutes=int(os.environ["ACCESS_TOKEN_EXPIRATION"])
-                ),
+                "exp": int(time.time()) + self._access_token_lifetime,
             },
             self._access_key,
             algorithm="HS256",
@@ -99,18 +115,47 @@ class JwtController:
             Refresh token
 
         """
-        refresh_token: str = encode(
+        refresh_token: str = self._jwt.encode(
             {
                 "user_id": user_id,
                 "session_id": session_id,
-                "exp": datetime.datetime.now()
-                + datetime.timedelta(days=int(os.environ["REFRESH_TOKEN_EXPIRATION"])),
+                "exp": int(time.time()) + self._refresh_token_lifetime,
             },
             self._refresh_key,
             algorithm="HS256",
         )
         return refresh_token
 
+    def generate_tokens(self, user_id: str, session_id: str) -> Tuple[str, str]:
+        """
+        Generate access and refresh tokens for provided user id and session id
+
+        Both tokens are signed from one claims dict that differs only in the expiration time
+
+        Parameters
+        ----------
+        user_id: str
+            User's id
+        session_id : str
+            Id of the current session
+
+        Returns
+        -------
+        Tuple[str, str]
+            Access and refresh tokens
+
+        """
+        now = int(time.time())
+        claims = {
+            "user_id": user_id,
+            "session_id": session_id,
+            "exp": now + self._access_token_lifetime,
+        }
+        access_token: str = self._jwt.encode(claims, self._access_key, algorithm="HS256")
+        claims["exp"] = now + self._refresh_token_lifetime
+        refresh_token: str = self._jwt.encode(claims, self._refresh_key, algorithm="HS256")
+        return access_token, refresh_token
+
     def decode(self, token: str, token_type: TokenType) -> Tuple[str, str]:
         """
         Decode token with provided type or throw an error
@@ -132,6 +177,33 @@ class JwtController:
         InvalidTokenError
             Token is invalid
 
+        """
+        user_id, session_id, _ = self.decode_with_expiration(token, token_type)
+        return user_id, session_id
+
+    def decode_with_expiration(
+        self, token: str, token_type: TokenType
+    ) -> Tuple[str, str, float]:
+        """
+        Decode token with provided type and get its expiration time or throw an error
+
+        Parameters
+        ----------
+        token: str
+            Token to decode
+        token_type: TokenType
+            Token type
+
+        Returns
+        -------
+        Tuple[str, str, float]
+            User's id, session id and token expiration time as a unix timestamp
+
+        Raises
+        ------
+        InvalidTokenError
+            Token is invalid
+
         """
         key = (
             self._access_key
@@ -139,16 +211,8 @@ class JwtController:
             else self._refresh_key
         )
         try:
-            data = dict(
-                decode(
-                    jwt=token,
-                    key=key,
-                    algorithms=[
-                        "HS256",
-                    ],
-                )
-            )
-            return str(data["user_id"]), str(data["session_id"])
+            data = self._jwt.decode(jwt=token, key=key, algorithms=self._ALGORITHMS)
+            return str(data["user_id"]), str(data["session_id"]), float(data["exp"])
         except DecodeError:
             raise InvalidTokenError("Invalid token")
         except ExpiredSignatureError:
@@ -0,0 +1,116 @@
+"""TTL cache"""
+
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+import time
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TtlCache(Generic[K, V]):
+    """
+    Bounded LRU cache which entries expire after the given time to live
+
+    Attributes
+    ----------
+    _entries : OrderedDict[K, Tuple[V, float]]
+        Cached values with their expiration time, least recently used first
+    _max_size : int
+        Maximum number of stored entries
+    _ttl : float
+        Time to live of the entry in seconds
+
+    Methods
+    -------
+    get(key)
+        Returns cached value or None if it is missing or expired
+    set(key, value, ttl)
+        Stores value for the provided key
+    pop(key)
+        Removes value for the provided key
+    pop_matching(predicate)
+        Removes all values matching the predicate
+
+    """
+
+    _entries: OrderedDict[K, Tuple[V, float]]
+    _max_size: int
+    _ttl: float
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._entries = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Get cached value
+
+        Parameters
+        ----------
+        key : K
+            Key of the value
+
+        Returns
+        -------
+        Optional[V]
+            Cached value or None if it is missing or expired
+
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Store value and evict the least recently used entry on overflow
+
+        Parameters
+        ----------
+        key : K
+            Key of the value
+        value : V
+            Value to store
+        ttl : Optional[float]
+            Time to live of the value in seconds. Can't exceed the default time to live of the cache
+
+        """
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """
+        Remove value
+
+        Parameters
+        ----------
+        key : K
+            Key of the value
+
+        """
+        self._entries.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[V], bool]) -> None:
+        """
+        Remove all values matching the predicate
+
+        Parameters
+        ----------
+        predicate : Callable[[V], bool]
+            Function that returns True for values to remove
+
+        """
+        for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
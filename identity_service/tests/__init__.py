@@ -0,0 +1 @@
+"""Identity service tests"""
@@ -0,0 +1,24 @@
+"""Custom interceptor tests"""
+
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+import grpc
+
+from errors import ValueNotFoundError
+from src.utilities import CustomInterceptor
+
+
+class AbortTest(IsolatedAsyncioTestCase):
+    """Tests of mapping errors to status codes"""
+
+    async def test_error_subclass_keeps_status_code(self) -> None:
+        """Subclasses of the domain errors must be mapped like their base class"""
+
+        class UserNotFoundError(ValueNotFoundError):
+            pass
+
+        error = UserNotFoundError("User not found")
+        context = AsyncMock()
+        await CustomInterceptor._abort(error, context)
+        context.abort.assert_awaited_once_with(grpc.StatusCode.NOT_FOUND, str(error))
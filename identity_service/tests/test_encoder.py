@@ -0,0 +1,35 @@
+"""Encoder tests"""
+
+from unittest import TestCase
+from unittest.mock import patch
+import os
+
+from src.utilities import Encoder
+
+
+class NeedsRehashTest(TestCase):
+    """Tests of the rehash check"""
+
+    def test_only_lower_costs_are_rehashed(self) -> None:
+        """Hashes made with a higher cost must never be downgraded"""
+        with patch.dict(os.environ, {"BCRYPT_COST": "12"}):
+            encoder = Encoder()
+        self.assertTrue(encoder.needs_rehash("$2b$10$" + "a" * 53))
+        self.assertFalse(encoder.needs_rehash("$2b$12$" + "a" * 53))
+        self.assertFalse(encoder.needs_rehash("$2b$14$" + "a" * 53))
+
+
+class RoundsTest(TestCase):
+    """Tests of the cost factor configuration"""
+
+    def test_cost_out_of_range_is_rejected(self) -> None:
+        """Costs below the minimum or above the bcrypt limit must fail at startup"""
+        for cost in ("4", "11", "32"):
+            with self.subTest(cost=cost), patch.dict(os.environ, {"BCRYPT_COST": cost}):
+                with self.assertRaises(ValueError):
+                    Encoder()
+
+    def test_cost_must_be_an_integer(self) -> None:
+        """Non numeric cost must fail at startup"""
+        with patch.dict(os.environ, {"BCRYPT_COST": "high"}), self.assertRaises(ValueError):
+            Encoder()
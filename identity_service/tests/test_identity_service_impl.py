@@ -0,0 +1,148 @@
+"""Identity service implementation tests"""
+
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+import asyncio
+import os
+import secrets
+import time
+
+from errors import UniqueError, ValueNotFoundError
+from src.identity_service_impl import IdentityServiceImpl
+from src.models import User
+from src.repository import MockTokenRepositoryImpl, MockUserRepositoryImpl
+from src.utilities import TokenType
+import src.generated.identity_service.auth_pb2 as auth_proto
+import src.generated.identity_service.get_access_token_pb2 as get_access_token_proto
+import src.generated.identity_service.update_user_pb2 as update_user_proto
+
+
+class ServiceTestCase(IsolatedAsyncioTestCase):
+    """Base of the tests that run the service with mock repositories"""
+
+    async def asyncSetUp(self) -> None:
+        os.environ.setdefault("ACCESS_SECRET", secrets.token_hex(16))
+        os.environ.setdefault("REFRESH_SECRET", secrets.token_hex(16))
+        os.environ.setdefault("ACCESS_TOKEN_EXPIRATION", "15")
+        os.environ.setdefault("REFRESH_TOKEN_EXPIRATION", "30")
+        os.environ.setdefault("BCRYPT_COST", "12")
+        self.password = secrets.token_hex(8)
+        self.service = IdentityServiceImpl(
+            user_repository=MockUserRepositoryImpl(), token_repository=MockTokenRepositoryImpl()
+        )
+        self.context = MagicMock()
+
+    async def asyncTearDown(self) -> None:
+        self.service.close()
+
+
+class UpdateUserTest(ServiceTestCase):
+    """Tests of the update user request"""
+
+    async def test_failed_update_keeps_sessions(self) -> None:
+        """Rejected update must not revoke refresh tokens of the user"""
+        await self.service.register(
+            update_user_proto.UserToModify(username="taken", email="taken@example.com", password=self.password),
+            self.context,
+        )
+        credentials = await self.service.register(
+            update_user_proto.UserToModify(username="user", email="user@example.com", password=self.password),
+            self.context,
+        )
+        new_user = update_user_proto.UserToModify(
+            id=credentials.user.id, username="taken", email="user@example.com", type=credentials.user.type
+        )
+        new_user.created_at.CopyFrom(credentials.user.created_at)
+
+        with self.assertRaises(UniqueError):
+            await self.service.update_user(
+                update_user_proto.UpdateUserRequest(new_user=new_user, requesting_user=credentials.user),
+                self.context,
+            )
+
+        response = await self.service.get_new_access_token(
+            get_access_token_proto.GetNewAccessTokenRequest(refresh_token=credentials.data.refresh_token),
+            self.context,
+        )
+        self.assertTrue(response.access_token)
+
+
+class LogoutTest(ServiceTestCase):
+    """Tests of the logout request"""
+
+    async def test_auth_after_logout_fails(self) -> None:
+        """Session cached by auth must be forgotten on logout"""
+        credentials = await self.service.register(
+            update_user_proto.UserToModify(username="logout", email="logout@example.com", password=self.password),
+            self.context,
+        )
+        access_token = auth_proto.AccessToken(access_token=credentials.data.access_token)
+        await self.service.auth(access_token, self.context)
+
+        await self.service.logout(access_token, self.context)
+
+        with self.assertRaises(ValueNotFoundError):
+            await self.service.auth(access_token, self.context)
+
+    async def test_logout_during_auth_is_not_undone(self) -> None:
+        """User fetched by auth before a concurrent logout must not be cached"""
+        credentials = await self.service.register(
+            update_user_proto.UserToModify(username="racing", email="racing@example.com", password=self.password),
+            self.context,
+        )
+        access_token = auth_proto.AccessToken(access_token=credentials.data.access_token)
+        user_repository = MockUserRepositoryImpl()
+        get_user_by_session_id = user_repository.get_user_by_session_id
+        user_fetched = asyncio.Event()
+        logged_out = asyncio.Event()
+
+        async def slow_get_user_by_session_id(session_id: str) -> User:
+            user = await get_user_by_session_id(session_id)
+            user_fetched.set()
+            await logged_out.wait()
+            return user
+
+        with patch.object(user_repository, "get_user_by_session_id", side_effect=slow_get_user_by_session_id):
+            auth = asyncio.create_task(self.service.auth(access_token, self.context))
+            await user_fetched.wait()
+            await self.service.logout(access_token, self.context)
+            logged_out.set()
+            await auth
+
+        with self.assertRaises(ValueNotFoundError):
+            await self.service.auth(access_token, self.context)
+
+
+class DecodeTokenTest(ServiceTestCase):
+    """Tests of the decoded tokens cache"""
+
+    def setUp(self) -> None:
+        patcher = patch("src.utilities.ttl_cache.time")
+        self.clock = patcher.start()
+        self.clock.monotonic.return_value = 100.0
+        self.addCleanup(patcher.stop)
+
+    async def test_token_is_not_cached_past_expiration(self) -> None:
+        """Token expiring before the cache time to live must be decoded again once it expires"""
+        with patch.object(
+            self.service._jwt_controller,
+            "decode_with_expiration",
+            return_value=("user_id", "session_id", time.time() + 2),
+        ) as decode:
+            self.service._decode_token("token", TokenType.ACCESS_TOKEN)
+            self.service._decode_token("token", TokenType.ACCESS_TOKEN)
+            self.assertEqual(decode.call_count, 1)
+            self.clock.monotonic.return_value = 102.5
+            self.service._decode_token("token", TokenType.ACCESS_TOKEN)
+            self.assertEqual(decode.call_count, 2)
+
+    async def test_expired_token_is_not_cached(self) -> None:
+        """Token that is already expired must never be served from the cache"""
+        with patch.object(
+            self.service._jwt_controller,
+            "decode_with_expiration",
+            return_value=("user_id", "session_id", time.time() - 1),
+        ) as decode:
+            self.service._decode_token("token", TokenType.ACCESS_TOKEN)
+            self.service._decode_token("token", TokenType.ACCESS_TOKEN)
+            self.assertEqual(decode.call_count, 2)
@@ -0,0 +1,63 @@
+"""TTL cache tests"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.utilities import TtlCache
+
+
+class TtlCacheTest(TestCase):
+    """Tests of the TTL cache"""
+
+    def setUp(self) -> None:
+        patcher = patch("src.utilities.ttl_cache.time")
+        self.clock = patcher.start()
+        self.clock.monotonic.return_value = 100.0
+        self.addCleanup(patcher.stop)
+
+    def test_value_expires_after_ttl(self) -> None:
+        """Value must be returned until its time to live passes"""
+        cache: TtlCache[str, int] = TtlCache(max_size=10, ttl=5)
+        cache.set("key", 1)
+        self.clock.monotonic.return_value = 104.9
+        self.assertEqual(cache.get("key"), 1)
+        self.clock.monotonic.return_value = 105.0
+        self.assertIsNone(cache.get("key"))
+
+    def test_ttl_is_capped_by_default(self) -> None:
+        """Value must not outlive the default time to live of the cache"""
+        cache: TtlCache[str, int] = TtlCache(max_size=10, ttl=5)
+        cache.set("short", 1, ttl=2)
+        cache.set("long", 2, ttl=60)
+        self.clock.monotonic.return_value = 102.0
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.get("long"), 2)
+        self.clock.monotonic.return_value = 105.0
+        self.assertIsNone(cache.get("long"))
+
+    def test_non_positive_ttl_is_not_stored(self) -> None:
+        """Value that is already expired must not be stored"""
+        cache: TtlCache[str, int] = TtlCache(max_size=10, ttl=5)
+        cache.set("zero", 1, ttl=0)
+        cache.set("negative", 2, ttl=-1)
+        self.assertIsNone(cache.get("zero"))
+        self.assertIsNone(cache.get("negative"))
+
+    def test_least_recently_used_is_evicted(self) -> None:
+        """Overflow must evict the entry that was not read or written for the longest time"""
+        cache: TtlCache[str, int] = TtlCache(max_size=2, ttl=5)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.get("first")
+        cache.set("third", 3)
+        self.assertEqual(cache.get("first"), 1)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), 3)
+
+    def test_pop_matching(self) -> None:
+        """Only values matching the predicate must be removed"""
+        cache: TtlCache[str, int] = TtlCache(max_size=10, ttl=5)
+        for value in range(4):
+            cache.set(str(value), value)
+        cache.pop_matching(lambda value: value % 2 == 0)
+        self.assertEqual([cache.get(str(value)) for value in range(4)], [None, 1, None, 3])